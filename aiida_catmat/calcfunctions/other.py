@@ -1,7 +1,5 @@
 """Other utilities"""
 
-import collections
-
 from aiida.orm import Dict
 from aiida.engine import calcfunction
 
@@ -17,11 +15,16 @@ def dict_merge(dct: dict, merge_dct: dict) -> None:
         dct (dict): dict onto which the merge is executed
         merge_dct (dict): dict merged into dict
     """
-    for k in merge_dct.keys():
-        if (k in dct and isinstance(dct[k], dict) and isinstance(merge_dct[k], collections.Mapping)):
-            dict_merge(dct[k], merge_dct[k])
-        else:
-            dct[k] = merge_dct[k]
+    # Walk nested levels with an explicit stack instead of recursion.
+    stack = [(dct, merge_dct)]
+    while stack:
+        to_dct, from_dct = stack.pop()
+        for k, v in from_dct.items():  #pylint: disable=invalid-name
+            to_v = to_dct.get(k)
+            if isinstance(to_v, dict) and isinstance(v, dict):
+                stack.append((to_v, v))
+            else:
+                to_dct[k] = v
 
 
 @calcfunction
@@ -35,14 +38,17 @@ def aiida_dict_merge(to_dict: Dict, from_dict: Dict) -> Dict:
     Returns:
         Dict: The resulting ``Dict``
     """
-    to_dict = to_dict.get_dict()
-
     if isinstance(from_dict, Dict):
         from_dict = from_dict.get_dict()
 
-    dict_merge(to_dict, from_dict)
+    merged = to_dict.get_dict()
+    # Disjoint top-level keys need no nested walk.
+    if merged.keys().isdisjoint(from_dict):
+        merged.update(from_dict)
+    else:
+        dict_merge(merged, from_dict)
 
-    return Dict(dict=to_dict)
+    return Dict(dict=merged)
 
 
 #EOF
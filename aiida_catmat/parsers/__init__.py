@@ -1,4 +1,5 @@
 """Customized parsers for `aiida-catmat`"""
+import re
 
 from pymatgen.io.vasp import Vasprun
 from pymatgen.electronic_structure.core import Spin
@@ -49,6 +50,14 @@ STDOUT_ERRS = {
 }
 
 STDERR_ERRS = {'walltime': ['PBS: job killed: walltime'], 'memory': ['job killed: memory']}
+
+# Flat ``(error, message)`` tables, in the same order as the dictionaries above.
+STDOUT_ERR_MSGS = tuple((err, msg) for err, msgs in STDOUT_ERRS.items() for msg in msgs)
+STDERR_ERR_MSGS = tuple((err, msg) for err, msgs in STDERR_ERRS.items() for msg in msgs)
+
+# Single patterns matching any known message, used to skip lines without errors.
+STDOUT_ERRS_RE = re.compile('|'.join(re.escape(msg) for _, msg in STDOUT_ERR_MSGS))
+STDERR_ERRS_RE = re.compile('|'.join(re.escape(msg) for _, msg in STDERR_ERR_MSGS))
 # From https://www.vasp.at/wiki/index.php/GGA
 GGA_FUNCTIONALS = {
     '91': 'PW91(Perdew-Wang91)',
@@ -89,6 +98,27 @@ METAGGA_FUNCTIONALS = {
 }
 
 
+def _scan_log(content, pattern, err_msgs):
+    """
+    Returns the errors of ``err_msgs`` found in ``content``.
+    ``pattern`` must match any of the messages; only the lines it hits are checked message by message.
+    """
+    errors = {}
+    line_end = -1
+    for match in pattern.finditer(content):
+        if match.start() < line_end:
+            continue
+        line_start = content.rfind('\n', 0, match.start()) + 1
+        line_end = content.find('\n', match.end())
+        if line_end == -1:
+            line_end = len(content)
+        line = content[line_start:line_end]
+        for err, msg in err_msgs:
+            if line.find(msg) != -1:
+                errors[err] = msg
+    return errors
+
+
 class VaspBaseParser(Parser):
     """Basic Parser for VaspCalculation"""
 
@@ -107,11 +137,14 @@ class VaspBaseParser(Parser):
         except:  #pylint: disable=bare-except
             vrun = None
 
-        try:
-            with self.retrieved.open('OUTCAR') as handler:
-                vout = Outcar(handler.name)
-        except:  #pylint: disable=bare-except
-            vout = None
+        # OUTCAR is only needed for magnetization of spin-polarized runs.
+        vout = None
+        if vrun and vrun.parameters['ISPIN'] == 2:
+            try:
+                with self.retrieved.open('OUTCAR') as handler:
+                    vout = Outcar(file_handler=handler)
+            except:  #pylint: disable=bare-except
+                vout = None
 
         errors = self._parse_stdout()
 
@@ -128,28 +161,15 @@ class VaspBaseParser(Parser):
 
     def _parse_stdout(self):
         """
-        Parses the _scheduler-stdout.txt and reports any found errors.
+        Parses the _scheduler-stdout.txt and _scheduler-stderr.txt and reports any found errors.
         """
         errors = {}
-        errors_subset_to_catch = list(STDOUT_ERRS.keys())
 
         with self.retrieved.open('_scheduler-stdout.txt') as handler:
-            for line in handler:
-                l = line.strip()  #pylint: disable=invalid-name
-                for err, msgs in STDOUT_ERRS.items():
-                    if err in errors_subset_to_catch:
-                        for msg in msgs:
-                            if l.find(msg) != -1:
-                                errors[err] = msg
+            errors.update(_scan_log(handler.read(), STDOUT_ERRS_RE, STDOUT_ERR_MSGS))
 
         with self.retrieved.open('_scheduler-stderr.txt') as handler:
-            for line in handler:
-                l = line.strip()  #pylint: disable=invalid-name
-                for err, msgs in STDOUT_ERRS.items():
-                    if err in errors_subset_to_catch:
-                        for msg in msgs:
-                            if l.find(msg) != -1:
-                                errors[err] = msg
+            errors.update(_scan_log(handler.read(), STDERR_ERRS_RE, STDERR_ERR_MSGS))
 
         return errors
 
@@ -158,15 +178,10 @@ class VaspBaseParser(Parser):
         """Parse results"""
 
         def _site_magnetization(structure, magnetizations):
-            site_mags = []
-            magmoms = []
             symbols = [specie.symbol for specie in structure.species]
-            for symbol, magnetization in zip(symbols, magnetizations):
-                mag_dict = {}
-                mag_dict[symbol] = magnetization
-                magmoms.append(magnetization['tot'])
-                magmoms = [0 if abs(mag) < 0.6 else mag for mag in magmoms]
-                site_mags.append(mag_dict)
+            site_mags = [{symbol: magnetization} for symbol, magnetization in zip(symbols, magnetizations)]
+            magmoms = [float(magnetization['tot']) for magnetization in magnetizations[:len(symbols)]]
+            magmoms = [0 if abs(mag) < 0.6 else mag for mag in magmoms]
             return site_mags, magmoms
 
         results = {}
@@ -200,14 +215,14 @@ class VaspBaseParser(Parser):
             results['extra_parameters']['ngzf'] = vrun.parameters['NGZF']
             results['run_type'] = vrun.run_type
             results['final_energy'] = vrun.final_energy
-            results['final_energy_per_atom'] = vrun.as_dict()['output']['final_energy_per_atom']
+            results['final_energy_per_atom'] = vrun.final_energy / len(vrun.final_structure)
             results['fermi_energy'] = vrun.efermi
             if vrun.parameters['ISPIN'] == 2:
                 results['spin_polarized'] = True
                 results['band_gap_spin_up'] = vrun.complete_dos.get_gap(spin=Spin.up)
                 results['band_gap_spin_down'] = vrun.complete_dos.get_gap(spin=Spin.down)
                 mags = vout.get_magnetization()
-                results['total_magnetization'] = mags['full_cell'][0]
+                results['total_magnetization'] = float(mags['full_cell'][0])
             else:
                 results['spin_polarized'] = False
                 results['band_gap_spin_up'] = vrun.complete_dos.get_gap()
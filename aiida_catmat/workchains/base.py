@@ -9,7 +9,7 @@ from aiida.orm import Dict, FolderData, CalcJobNode, StructureData
 from aiida.plugins import CalculationFactory
 
 from aiida_catmat.calcfunctions import dict_merge
-from aiida_catmat.parsers import STDERR_ERRS, STDOUT_ERRS
+from aiida_catmat.parsers import STDERR_ERR_MSGS, STDERR_ERRS_RE, STDOUT_ERR_MSGS, STDOUT_ERRS_RE, _scan_log
 
 # StructureData = DataFactory('structure')  # pylint: disable=invalid-name
 VaspCalculation = CalculationFactory('vasp.vasp')  # pylint: disable=invalid-name
@@ -42,7 +42,7 @@ def apply_strain_on_structure(retrived_folder: FolderData) -> StructureData:
         StructureData: The structure after applying 0.2 strain.
     """
     with retrived_folder.open('CONTCAR') as handler:
-        structure = Structure.from_file(handler.name)
+        structure = Structure.from_str(handler.read(), fmt='poscar')
     structure.apply_strain(0.2)
     return StructureData(pymatgen_structure=structure)
 
@@ -56,18 +56,8 @@ def get_stdout_errs(calculation: CalcJobNode) -> set:
     Returns:
         set: A set of found error messages in ``_scheduler-stdout.txt``
     """
-    errors = set()
-    errors_subset_to_catch = list(STDOUT_ERRS.keys())
-
     with calculation.outputs.retrieved.open('_scheduler-stdout.txt') as handler:
-        for line in handler:
-            l = line.strip()  #pylint: disable=invalid-name
-            for err, msgs in STDOUT_ERRS.items():
-                if err in errors_subset_to_catch:
-                    for msg in msgs:
-                        if l.find(msg) != -1:
-                            errors.add(err)
-    return errors
+        return set(_scan_log(handler.read(), STDOUT_ERRS_RE, STDOUT_ERR_MSGS))
 
 
 def get_stderr_errs(calculation: CalcJobNode) -> set:
@@ -79,19 +69,8 @@ def get_stderr_errs(calculation: CalcJobNode) -> set:
     Returns:
         set: A set of found error messages in ``_scheduler-stderr.txt``
     """
-    errors = set()
-    errors_subset_to_catch = list(STDERR_ERRS.keys())
-
     with calculation.outputs.retrieved.open('_scheduler-stderr.txt') as handler:
-        for line in handler:
-            l = line.strip()  #pylint: disable=invalid-name
-            for err, msgs in STDOUT_ERRS.items():
-                if err in errors_subset_to_catch:
-                    for msg in msgs:
-                        if l.find(msg) != -1:
-                            errors.add(err)
-
-    return errors
+        return set(_scan_log(handler.read(), STDERR_ERRS_RE, STDERR_ERR_MSGS))
 
 
 #pylint: disable=inconsistent-return-statements
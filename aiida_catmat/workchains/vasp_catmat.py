@@ -27,11 +27,11 @@ def update_structure(structure: StructureData, anode: Dict) -> StructureData:
         StructureData: Fully deintercalted structure object.
     """
     strc_pmg = structure.get_pymatgen_structure(add_spin=True)
-    species = strc_pmg.species
-    el_to_remove = list(anode.get_dict().keys())
-    for sp in species:  #pylint: disable=invalid-name
-        if sp.element == Element(el_to_remove[0]):
-            strc_pmg.remove_species([sp])
+    el_to_remove = Element(next(iter(anode.get_dict())))
+    # Spin-decorated species do not compare equal to the bare element, so collect the distinct ones
+    # and remove them all in a single pass over the sites.
+    species_to_remove = {sp for sp in strc_pmg.species if sp.element == el_to_remove}
+    strc_pmg.remove_species(list(species_to_remove))
     return StructureData(pymatgen_structure=strc_pmg)
 
 
@@ -56,14 +56,11 @@ def calculate_cathode_props( #pylint: disable=too-many-locals
     def _get_stg_idx(item):
         return item.split('_')[1]
 
-    stgs = list(discharged.keys())
-    stgs.sort(key=_get_stg_idx)
-    last_stg = stgs[-1]
+    last_stg = max(discharged.keys(), key=_get_stg_idx)
     enrg_discharged = discharged.get_dict()[last_stg]['final_energy']
     enrg_charged = charged.get_dict()[last_stg]['final_energy']
     anode_info = anode.get_dict()
-    anode_el = list(anode_info.keys())[0]
-    anode_mu = list(anode_info.values())[0]
+    anode_el, anode_mu = next(iter(anode_info.items()))
     nions = discharged_structure.get_composition()[anode_el]
 
     discharged_structure_pmg = discharged_structure.get_pymatgen_structure()
@@ -98,7 +95,7 @@ def calculate_cathode_props( #pylint: disable=too-many-locals
         'lattice_parameters_unit': 'A',
         'volume_change_unit': '%',
         'change_direction': 'charging',
-        'battery_type': f'{list(anode_info.keys())[0]}-ion',
+        'battery_type': f'{anode_el}-ion',
         'gravimetric_specific_capacity_unit': 'mAh/g',
         'volumetric_specific_capacity_unit': 'mAh/cm^3',
         'gravimetric_energy_density_unit': 'Wh/kg',
@@ -114,7 +111,7 @@ def calculate_cathode_props( #pylint: disable=too-many-locals
         'volumetric_energy_density': round(energy_density_vol, 1),
         'energy_of_charged_state': enrg_charged,
         'energy_of_discharged_state': enrg_discharged,
-        f'number_of_extracted_{list(anode_info.keys())[0]}_ions': nions,
+        f'number_of_extracted_{anode_el}_ions': nions,
         'anode_chemical_potential': anode_mu
     }
     return Dict(dict=ocv_dict)
@@ -1,11 +1,15 @@
 """``VaspMultiStageWorkChain`` - A general purpose and modular AiiDA workchain
 to combine any sequence of ``VASP`` calculation"""
+import copy
+import functools
 import os
 import yaml
+import numpy as np
 
+from pymatgen.core.periodic_table import Element
 from pymatgen.core.structure import Structure
 
-from aiida.orm import Bool, CifData, Dict, Int, Float, List, RemoteData, Str, WorkChainNode, StructureData
+from aiida.orm import Bool, CifData, Dict, Int, Float, List, RemoteData, Str, WorkChainNode, StructureData, load_node
 from aiida.common import AttributeDict
 from aiida.engine import calcfunction, WorkChain, ToContext, append_, while_
 from aiida.plugins import DataFactory, WorkflowFactory
@@ -18,6 +22,76 @@ PotcarData = DataFactory('vasp.potcar')  #pylint: disable=invalid-name
 KpointsData = DataFactory('array.kpoints')  #pylint: disable=invalid-name
 # StructureData = DataFactory('structure')  #pylint: disable=invalid-name
 
+# Locations of the bundled ``POTCAR``/``U`` sets and ``INCAR`` protocols
+_THISDIR = os.path.dirname(os.path.abspath(__file__))
+_HUBBARD_YAML = os.path.join(_THISDIR, '..', 'data', 'hubbard_sets.yaml')
+_POTCAR_YAML = os.path.join(_THISDIR, '..', 'data', 'potcar_sets.yaml')
+_PROTOCOL_DIR = os.path.join(_THISDIR, 'protocols', 'vasp')
+
+# Use the libyaml based loader when PyYAML is compiled against it
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)  #pylint: disable=invalid-name
+
+# Translation table to strip the digits from kind names, e.g. ``Fe1`` -> ``Fe``
+_DIGIT_STRIP = str.maketrans('', '', '0123456789')
+
+# ``INCAR`` tags which are carried over from the previous stage
+_INHERIT_PARAMS = frozenset({'ALGO', 'ISMEAR', 'SIGMA', 'SYMPREC', 'AMIN', 'ISYM', 'KPAR', 'LREAL'})
+
+
+@functools.lru_cache(maxsize=None)
+def _load_yaml_cached(yaml_path: str, mtime: float) -> dict:  #pylint: disable=unused-argument
+    """Parses a ``yaml`` file. Results are memoized on path and modification time.
+
+    Args:
+        yaml_path (str): Absolute path to the ``yaml`` file.
+
+        mtime (float): Modification time of the file. Only used as part of the cache key.
+
+    Returns:
+        dict: The parsed content. It is shared between callers and must not be modified in place.
+    """
+    with open(yaml_path, 'r') as handler:
+        return yaml.load(handler, Loader=_YamlLoader)
+
+
+def load_yaml(yaml_path: str) -> dict:
+    """Returns the parsed content of a ``yaml`` file, only reading it from disk once it has changed.
+
+    Args:
+        yaml_path (str): Absolute path to the ``yaml`` file.
+
+    Returns:
+        dict: The parsed content. It is shared between callers and must not be modified in place.
+    """
+    return _load_yaml_cached(yaml_path, os.path.getmtime(yaml_path))
+
+
+@functools.lru_cache(maxsize=16)
+def _load_pymatgen_with_spin(uuid: str) -> Structure:
+    """Converts the stored structure with the given ``uuid`` to a ``pymatgen`` structure including the spins.
+
+    Args:
+        uuid (str): The ``uuid`` of a stored ``StructureData``.
+
+    Returns:
+        Structure: The ``pymatgen`` structure object. It is shared between callers and must not be modified in place.
+    """
+    return load_node(uuid).get_pymatgen_structure(add_spin=True)
+
+
+def _to_pymatgen_with_spin(structure: StructureData) -> Structure:
+    """Converts an ``AiiDA`` structure to a ``pymatgen`` structure including the spins.
+
+    Args:
+        structure (StructureData): The ``AiiDA`` structure object
+
+    Returns:
+        Structure: A ``pymatgen`` structure object which the caller is free to modify.
+    """
+    if not structure.is_stored:
+        return structure.get_pymatgen_structure(add_spin=True)
+    return _load_pymatgen_with_spin(structure.uuid).copy()
+
 
 def get_magmom(structure_pmg: Structure) -> dict:
     """Construct ``MAGMOM`` tag from pymatgen structure object.
@@ -34,32 +108,19 @@ def get_magmom(structure_pmg: Structure) -> dict:
     Returns:
         dict: The initial ``MAGMOM`` to setup the calculation.
     """
+    species = structure_pmg.species
+    nsites = len(species)
     # Get default
-    default_magmoms = []
-    for specie in structure_pmg.species:
-        if specie.Z > 56:
-            default_magmoms.append(7)
-        elif specie.Z > 20:
-            default_magmoms.append(5)
-        else:
-            default_magmoms.append(0.6)
+    atomic_numbers = np.fromiter((specie.Z for specie in species), dtype=np.int16, count=nsites)
+    default_magmoms = np.where(atomic_numbers > 56, 7.0, np.where(atomic_numbers > 20, 5.0, 0.6))
 
     # Get from structure
-    strc_magmoms = []
-    for site in structure_pmg:
-        if hasattr(site.specie, 'spin'):
-            strc_magmoms.append(site.specie.spin)
-        else:
-            strc_magmoms.append(0)
+    strc_magmoms = np.fromiter((getattr(specie, 'spin', 0) or 0 for specie in species), dtype=np.float64, count=nsites)
+
     # merge
-    magmom = []
-    for m1, m2 in zip(strc_magmoms, default_magmoms):  #pylint: disable=invalid-name
-        if m1 != 0:
-            magmom.append(m1 * m2)
-        else:
-            magmom.append(m2)
+    magmom = np.where(strc_magmoms != 0, strc_magmoms * default_magmoms, default_magmoms)
     magmom_dict = {}
-    magmom_dict['MAGMOM'] = magmom
+    magmom_dict['MAGMOM'] = magmom.tolist()
     return magmom_dict
 
 
@@ -75,37 +136,30 @@ def get_hubbard(structure: StructureData, hubbard_tag: str) -> dict:
     Returns:
         dict: A disctionary of all needed tags related to ``DFT+U`` calculation.
     """
-    thisdir = os.path.dirname(os.path.abspath(__file__))
-    yaml_path = os.path.join(thisdir, '..', 'data', 'hubbard_sets.yaml')
-    with open(yaml_path, 'r') as file:
-        hubbard_sets = yaml.safe_load(file)
-    hubbard_params = hubbard_sets[hubbard_tag]
-
-    structure_pmg = structure.get_pymatgen_structure(add_spin=True)
+    hubbard_params = load_yaml(_HUBBARD_YAML)[hubbard_tag]
 
-    if any(element.Z > 56 for element in structure_pmg.composition):
+    # ``LMAXMIX`` only depends on the elements present, no need for a ``pymatgen`` structure.
+    max_z = max(Element(symbol).Z for symbol in structure.get_symbols_set())
+    if max_z > 56:
         lmaxmix = 6
-    elif any(element.Z > 20 for element in structure_pmg.composition):
+    elif max_z > 20:
         lmaxmix = 4
+    else:
+        lmaxmix = 2
 
     hubbard_dict = {'LDAU': True, 'LDAUPRINT': 1, 'LDAUTYPE': 2, 'LMAXMIX': lmaxmix}
 
-    LDAUU = []  #pylint: disable=invalid-name
-    LDAUJ = []  #pylint: disable=invalid-name
-    LDAUL = []  #pylint: disable=invalid-name
-
-    kinds = structure.get_kind_names()
-    for kind in kinds:
-        kind_no_digit = ''.join(i for i in kind if not i.isdigit())
-        if kind_no_digit in hubbard_params['LDAUU']:
-            LDAUU.append(hubbard_params['LDAUU'][kind_no_digit])
-            LDAUJ.append(hubbard_params['LDAUJ'][kind_no_digit])
-            LDAUL.append(hubbard_params['LDAUL'][kind_no_digit])
-        else:
-            LDAUU.append(0)
-            LDAUJ.append(0)
-            LDAUL.append(-1)
-    hubbard_dict.update({'LDAUU': LDAUU, 'LDAUJ': LDAUJ, 'LDAUL': LDAUL})
+    # Elements without ``U`` get the neutral values. The three tables in ``hubbard_sets.yaml`` share their keys.
+    get_u = hubbard_params['LDAUU'].get
+    get_j = hubbard_params['LDAUJ'].get
+    get_l = hubbard_params['LDAUL'].get
+
+    elements = [kind.translate(_DIGIT_STRIP) for kind in structure.get_kind_names()]
+    hubbard_dict.update({
+        'LDAUU': [get_u(element, 0) for element in elements],
+        'LDAUJ': [get_j(element, 0) for element in elements],
+        'LDAUL': [get_l(element, -1) for element in elements],
+    })
     return hubbard_dict
 
 
@@ -120,19 +174,8 @@ def get_potcar_mapping(structure: StructureData, potcar_set_tag: str) -> dict:
     Returns:
         dict: A dictionary which maps atomic kinds to relevant ``POTCAR`` s.
     """
-    thisdir = os.path.dirname(os.path.abspath(__file__))
-    yaml_path = os.path.join(thisdir, '..', 'data', 'potcar_sets.yaml')
-
-    with open(yaml_path) as default:
-        potcar_dict = yaml.safe_load(default)
-        sel_potcars = potcar_dict[potcar_set_tag.value]
-
-    mapping = {}
-    kinds = structure.get_kind_names()
-    for kind in kinds:
-        kind_no_digit = ''.join(i for i in kind if not i.isdigit())
-        mapping[kind] = sel_potcars[kind_no_digit]
-    return mapping
+    sel_potcars = load_yaml(_POTCAR_YAML)[potcar_set_tag.value]
+    return {kind: sel_potcars[kind.translate(_DIGIT_STRIP)] for kind in structure.get_kind_names()}
 
 
 def should_sort_structure(structure: StructureData) -> bool:
@@ -146,72 +189,41 @@ def should_sort_structure(structure: StructureData) -> bool:
     Returns:
         bool: Returns ``True`` if the structure needs to sorted.
     """
-    import functools  #pylint: disable=import-outside-toplevel
-
-    structure_pmg = structure.get_pymatgen_structure(add_spin=True)
-    structure_pmg_sorted = structure.get_pymatgen_structure(add_spin=True)
-    structure_pmg_sorted.sort()
-    species = structure_pmg.species
-    species_sorted = structure_pmg_sorted.species
-
-    spin = []
-    for s in species:  #pylint: disable=invalid-name
-        spin.append(getattr(s, 'spin', 0))
-    spin_sorted = []
-    for s in species_sorted:  #pylint: disable=invalid-name
-        spin_sorted.append(getattr(s, 'spin', 0))
-    stat = []
-
-    if functools.reduce(lambda i, j: i and j, map(lambda m, k: m == k, spin, spin_sorted), True):
-        stat.append(False)
-    else:
-        stat.append(True)
-    return all(stat)
+    structure_pmg = _to_pymatgen_with_spin(structure)
+    spin = [getattr(s, 'spin', 0) for s in structure_pmg.species]  #pylint: disable=invalid-name
+    # ``_to_pymatgen_with_spin`` returns a copy, so it is safe to sort in place.
+    structure_pmg.sort()
+    spin_sorted = [getattr(s, 'spin', 0) for s in structure_pmg.species]  #pylint: disable=invalid-name
+    return spin != spin_sorted
 
 
-@calcfunction
-def setup_protocols(protocol_tag: Str, structure: StructureData, user_incar_settings: Str) -> Dict:
+def setup_protocols(protocol_tag: str, structure: StructureData, user_incar_settings: dict) -> dict:
     """Constructs the all ``INCAR`` settings from a ``protocol_tag`` and user-defined settings.
 
     Args:
-        protocol_tag (Str): An string which defines the protocol to be used.
+        protocol_tag (str): An string which defines the protocol to be used.
 
         structure (StructureData): The ``AiiDA`` structure object
 
-        user_incar_settings (Str): The user-defined ``INCAR`` tags to overwrite/append protocol onces.
+        user_incar_settings (dict): The user-defined ``INCAR`` tags to overwrite/append protocol onces.
 
     Returns:
-        Dict: A dictionary of all ``INCAR`` settings for the whole stages of workchain.
+        dict: A dictionary of all ``INCAR`` settings for the whole stages of workchain.
     """
     # Get user-defined stages and alternative settings from yaml file
-    thisdir = os.path.dirname(os.path.abspath(__file__))
-    protocol_path = os.path.join(thisdir, 'protocols', 'vasp', protocol_tag.value + '.yaml')
-    with open(protocol_path, 'r') as protocol:
-        protocol = yaml.safe_load(protocol)
-
-    # User-defined INCAR settings passed to workchain.
-    user_incar_settings = user_incar_settings.get_dict()
-
-    if user_incar_settings['LDAU']:
-        for key in protocol.keys():
-            protocol[key]['LDAU'] = True
+    protocol_path = os.path.join(_PROTOCOL_DIR, protocol_tag + '.yaml')
+    protocol = copy.deepcopy(load_yaml(protocol_path))
 
     # Check for LREAL
-    nions = 0
-    comp = structure.get_composition()
-    for nion in comp.values():
-        nions += nion
-    if nions <= 8:
-        lreal = {'LREAL': False}
-    else:
-        lreal = {'LREAL': 'Auto'}
+    nions = len(structure.sites)
+    lreal = {'LREAL': False} if nions <= 8 else {'LREAL': 'Auto'}
 
-    # Update MAGMOM and LDAU section in all stages!
-    for key in protocol.keys():
-        dict_merge(protocol[key], lreal)
-        dict_merge(protocol[key], user_incar_settings)
+    # User settings (including ``LDAU``) are merged into every stage in a single pass.
+    for stage_incar in protocol.values():
+        stage_incar.update(lreal)
+        dict_merge(stage_incar, user_incar_settings)
 
-    return Dict(dict=protocol)
+    return protocol
 
 
 @calcfunction
@@ -249,59 +261,52 @@ def sort_structure(structure: StructureData) -> StructureData:
     Returns:
         StructureData: The ``AiiDA`` structure object (sorted version of input structure)
     """
-    structure_pmg = structure.get_pymatgen_structure(add_spin=True)
+    structure_pmg = _to_pymatgen_with_spin(structure)
     structure_pmg.sort()
     return StructureData(pymatgen_structure=structure_pmg)
 
 
-@calcfunction
 def get_stage_incar(
-    protocol: Dict,
+    protocol: dict,
     structure: StructureData,
-    stage_tag: Str,
+    stage_tag: str,
     hubbard_tag: Str = None,
     prev_incar: Dict = None,
-    modifications: Dict = None
-) -> Dict:
+    modifications: dict = None
+) -> dict:
     """Constructs the ``INCAR`` tags for each stage of calculation.
 
     Args:
-        protocol (Dict): All ``INCAR`` settings for whole workchain.
+        protocol (dict): All ``INCAR`` settings for whole workchain.
 
         structure (StructureData): The ``AiiDA`` structure object
 
-        stage_tag (Str): Specific tag for the current stage of calculation.
+        stage_tag (str): Specific tag for the current stage of calculation.
 
         hubbard_tag (Str, optional): The tag which defines which set ``U`` parameters to be used. Defaults to ``None``.
 
         prev_incar (Dict, optional): The ``INCAR`` settings from a previous stage. Defaults to None.
 
-        modifications (Dict, optional): The modifications which are suggested by error handler. Defaults to ``None``.
+        modifications (dict, optional): The modifications which are suggested by error handler. Defaults to ``None``.
 
     Returns:
-       Dict: The resuting `INCAR`.
+       dict: The resuting `INCAR`.
     """
-    next_incar = protocol[stage_tag.value]
-    structure_pmg = structure.get_pymatgen_structure(add_spin=True)
-    magmom = get_magmom(structure_pmg)
-    dict_merge(next_incar, magmom)
+    # Only top-level tags are replaced below, so a shallow copy keeps the in-context protocol intact.
+    next_incar = dict(protocol[stage_tag])
+    # Both MAGMOM and LDAU sections are flat, so a plain update is enough.
+    next_incar.update(get_magmom(_to_pymatgen_with_spin(structure)))
     if hubbard_tag:
-        hubbard = get_hubbard(structure, hubbard_tag.value)
-        dict_merge(next_incar, hubbard)
+        next_incar.update(get_hubbard(structure, hubbard_tag.value))
     if prev_incar:
-        param_list = ['ALGO', 'ISMEAR', 'SIGMA', 'SYMPREC', 'AMIN', 'ISYM', 'KPAR', 'LREAL']
         prev_incar = prev_incar.get_dict()
         # Update next incar with params from previous INCAR
-        for param in param_list:
-            if param in prev_incar:
-                next_incar[param] = prev_incar[param]
-        if prev_incar['IBRION'] == -1:
+        next_incar.update({param: prev_incar[param] for param in _INHERIT_PARAMS.intersection(prev_incar)})
+        if prev_incar.get('IBRION') == -1:
             next_incar['LREAL'] = False
     if modifications:
-        modifications = modifications.get_dict()
-        for key, value in modifications.items():
-            next_incar[key] = value
-    return Dict(dict=next_incar)
+        next_incar.update(modifications)
+    return next_incar
 
 
 @calcfunction
@@ -311,11 +316,9 @@ def extract_wrap_results(**all_outputs: Dict) -> Dict:
     Returns:
         Dict: Results in the format of a dictionary.
     """
-    results_dict = {}
-    for key, value in all_outputs.items():
-        results_dict[key] = value.get_dict()
-        if 'complete_site_magnetizations' in results_dict[key]:
-            del results_dict[key]['complete_site_magnetizations']
+    results_dict = {key: value.get_dict() for key, value in all_outputs.items()}
+    for stage_results in results_dict.values():
+        stage_results.pop('complete_site_magnetizations', None)
     return Dict(dict=results_dict)
 
 
@@ -327,15 +330,13 @@ def get_last_input(workchain: WorkChainNode) -> Dict:
 
     Returns:
         Dict: The ``INCAR`` dictionary of the last stage of input workchain.
+
+    Raises:
+        ValueError: If the workchain has not called any ``VaspCalculation``.
     """
-    calcjobs = []
-    descendants = workchain.called_descendants
-    for desc in descendants:
-        if desc.process_label == 'VaspCalculation':
-            calcjobs.append(desc)
-    pks = [cjob.pk for cjob in calcjobs]
-    last_index = pks.index(max(pks))
-    return calcjobs[last_index].inputs.parameters
+    calcjobs = (desc for desc in workchain.called_descendants if desc.process_label == 'VaspCalculation')
+    last_calcjob = max(calcjobs, key=lambda cjob: cjob.pk)
+    return last_calcjob.inputs.parameters
 
 
 #pylint: disable=inconsistent-return-statements
@@ -451,24 +452,13 @@ class VaspMultiStageWorkChain(WorkChain):
         if 'kspacing' in self.inputs:
             self.ctx.kgamma = self.inputs.kgamma if 'kgamma' in self.inputs else Bool(False)
             self.ctx.force_parity = self.inputs.force_parity if 'force_parity' in self.inputs else Bool(False)
-            if 'kgamma' in self.inputs:
-                if self.inputs.kgamma:
-                    kpoints = set_kpoints( #pylint: disable=unexpected-keyword-arg
-                        self.ctx.current_structure, self.inputs.kspacing, self.ctx.kgamma, self.ctx.force_parity,
-                        metadata={
-                            'label':'set_kpoints',
-                            'description': 'calcfuntion to construct kpoints from kspacing',
-                            'call_link_label':'run_set_kpoints'
-                        })
-            else:
-                kpoints = set_kpoints( #pylint: disable=unexpected-keyword-arg
-                    self.ctx.current_structure, self.inpts.kspacing, self.ctx.kgamma, self.ctx.force_parity,
-                    metadata={
-                            'label':'set_kpoints',
-                            'description': 'calcfuntion to construct kpoints from kspacing',
-                            'call_link_label':'run_set_kpoints'
-                    })
-            self.ctx.vasp_base.vasp.kpoints = kpoints
+            self.ctx.vasp_base.vasp.kpoints = set_kpoints( #pylint: disable=unexpected-keyword-arg
+                self.ctx.current_structure, self.inputs.kspacing, self.ctx.kgamma, self.ctx.force_parity,
+                metadata={
+                    'label':'set_kpoints',
+                    'description': 'calcfuntion to construct kpoints from kspacing',
+                    'call_link_label':'run_set_kpoints'
+                })
         elif 'kpoints' in self.inputs.vasp_base.vasp:
             self.ctx.vasp_base.vasp.kpoints = self.inputs.vasp_base.vasp.kpoints
         else:
@@ -482,26 +472,21 @@ class VaspMultiStageWorkChain(WorkChain):
         if self.inputs.parameters['LDAU']:
             self.ctx.hubbard_tag = self.inputs.hubbard_tag
 
-        self.ctx.protocol = setup_protocols( #pylint: disable=unexpected-keyword-arg
-            self.inputs.protocol_tag,
-            self.ctx.current_structure,
-            self.inputs.parameters,
-            metadata={
-                'label':'setup_protocol',
-                'description': 'calcfuntion to get and setup INCAR for all stages.',
-                'call_link_label':'run_setup_protocol'})
+        self.ctx.protocol = setup_protocols(
+            self.inputs.protocol_tag.value, self.ctx.current_structure, self.inputs.parameters.get_dict()
+        )
 
         # Settings
         if 'settings' in self.inputs:
-            settings = AttributeDict(self.inputs.settings.get_dict())
+            self.ctx.vasp_base.vasp.settings = self.inputs.settings
         else:
-            settings = AttributeDict({'ADDITIONAL_RETRIEVE_LIST': ['INCAR', 'OSZICAR']})
-            self.inputs.settings = settings
-        self.ctx.vasp_base.vasp.settings = self.inputs.settings
+            self.ctx.vasp_base.vasp.settings = {'ADDITIONAL_RETRIEVE_LIST': ['INCAR', 'OSZICAR']}
         self.ctx.all_outputs = {}
         self.ctx.stage_iteration = 0
+        self.ctx.max_stage_iteration = self.inputs.max_stage_iteration.value
         self.ctx.prev_incar = None
         self.ctx.modifications = None
+        self.ctx.potential_kinds = None
 
         # Restart folder
         # It is useful if user wants to restart later!
@@ -511,21 +496,22 @@ class VaspMultiStageWorkChain(WorkChain):
             self.ctx.restart_folder = None
 
         self.ctx.stage_idx = 0
-        if f'stage_{self.ctx.stage_idx}' in self.ctx.protocol.get_dict():
+        if f'stage_{self.ctx.stage_idx}' in self.ctx.protocol:
             self.ctx.should_run_next_stage = True
         else:
             return self.exit_codes.ERROR_PROTOCOL_TAG  #pylint: disable=no-member
 
         # Get the requested calculation types
         self.ctx.stage_calc_types = {}
-        for stage_tag in list(self.ctx.protocol.keys()):
-            if self.ctx.protocol[stage_tag]['IBRION'] in [-1, 1, 2, 3]:
-                if self.ctx.protocol[stage_tag]['IBRION'] == -1:
+        for stage_tag, stage_incar in self.ctx.protocol.items():
+            ibrion = stage_incar['IBRION']
+            if ibrion in [-1, 1, 2, 3]:
+                if ibrion == -1:
                     self.ctx.stage_calc_types[stage_tag] = 'static'
                 else:
                     self.ctx.stage_calc_types[stage_tag] = 'relaxation'
             else:
-                return self.ctx.exit_codes.ERROR_UNSUPPORTED_CALC
+                return self.exit_codes.ERROR_UNSUPPORTED_CALC  #pylint: disable=no-member
 
     def should_run_next_stage(self):
         """True if there is another stage to run"""
@@ -534,6 +520,8 @@ class VaspMultiStageWorkChain(WorkChain):
     def run_stage(self):
         """Prepares and submits static calculations as long as they are needed."""
         self.ctx.stage_tag = f'stage_{self.ctx.stage_idx}'
+        calc_type = self.ctx.stage_calc_types[self.ctx.stage_tag]
+        label = f'{self.ctx.stage_tag}_{calc_type}'
 
         # Check if structure needs to be sorted and do it.
         if should_sort_structure(self.ctx.current_structure):
@@ -548,70 +536,60 @@ class VaspMultiStageWorkChain(WorkChain):
 
         self.ctx.vasp_base.vasp.structure = self.ctx.current_structure
 
-        self.inputs.potential_mapping = get_potcar_mapping( #pylint: disable=unexpected-keyword-arg
-            self.ctx.current_structure,
-            self.inputs.potcar_set)
-
-        self.ctx.vasp_base.vasp.potential = PotcarData.get_potcars_from_structure(
-            structure=self.ctx.current_structure,
-            family_name=self.inputs.potential_family.value,
-            mapping=self.inputs.potential_mapping
-        )
+        # POTCARs only depend on the kinds, so they are reused until the kinds change.
+        kinds = self.ctx.current_structure.get_kind_names()
+        if kinds != self.ctx.potential_kinds:
+            self.ctx.potential_mapping = get_potcar_mapping(self.ctx.current_structure, self.inputs.potcar_set)
+            self.ctx.potential = PotcarData.get_potcars_from_structure(
+                structure=self.ctx.current_structure,
+                family_name=self.inputs.potential_family.value,
+                mapping=self.ctx.potential_mapping
+            )
+            self.ctx.potential_kinds = kinds
+        self.ctx.vasp_base.vasp.potential = self.ctx.potential
 
         # Get relevant INCAR for the current stage.
-        self.ctx.vasp_base.vasp.parameters = get_stage_incar( #pylint: disable=unexpected-keyword-arg
-            self.ctx.protocol, self.ctx.current_structure, Str(self.ctx.stage_tag),
+        self.ctx.vasp_base.vasp.parameters = get_stage_incar(
+            self.ctx.protocol, self.ctx.current_structure, self.ctx.stage_tag,
             hubbard_tag=self.ctx.hubbard_tag,
             prev_incar=self.ctx.prev_incar,
-            modifications=Dict(dict=self.ctx.modifications),
-            metadata={
-                'label':'get_stage_incar',
-                'description': 'calcfuntion to get INCAR for current stage',
-                'call_link_label':'run_get_stage_incar'
-            })
+            modifications=self.ctx.modifications
+        )
 
         # Restart
         if self.ctx.restart_folder:
             self.ctx.vasp_base.vasp.restart_folder = self.ctx.restart_folder
 
         # Update lable anc call_link_label
-        self.ctx.vasp_base.vasp['metadata'].update({
-            'label':
-            f'{self.ctx.stage_tag}_{self.ctx.stage_calc_types[self.ctx.stage_tag]}',
-            'call_link_label':
-            f'run_{self.ctx.stage_tag}_{self.ctx.stage_calc_types[self.ctx.stage_tag]}',
-        })
-        self.ctx.vasp_base['metadata'] = {}
-        self.ctx.vasp_base['metadata']['label'] = self.ctx.vasp_base.vasp['metadata']['label']
-        self.ctx.vasp_base['metadata']['call_link_label'] = self.ctx.vasp_base.vasp['metadata']['call_link_label']
+        self.ctx.vasp_base.vasp['metadata'].update({'label': label, 'call_link_label': f'run_{label}'})
+        self.ctx.vasp_base['metadata'] = {'label': label, 'call_link_label': f'run_{label}'}
 
         inputs = prepare_process_inputs(VaspBaseWorkChain, self.ctx.vasp_base)
         running = self.submit(VaspBaseWorkChain, **inputs)
-        tag = self.ctx.stage_tag
-        calc_type = self.ctx.stage_calc_types[self.ctx.stage_tag]
-        self.report(f'Submitted VaspBaseWorkchain <pk>:{running.pk} for {tag}_{calc_type}')
+        self.report(f'Submitted VaspBaseWorkchain <pk>:{running.pk} for {label}')
         return ToContext(workchain=(append_(running)))
 
     def inspect_stage(self):  #pylint: disable=too-many-statements
         """Do the inspection of finished stage!"""
-        try:
-            workchain = self.ctx.workchain[-1]
-        except IndexError:
-            self.report(
-                'There is no {} in the called workchain list.'.format(self.ctx.workchain_static[-1].process_label)
-            )
+        workchain = self.ctx.workchain[-1] if self.ctx.get('workchain') else None
+        if workchain is None:
+            self.report(f'There is no {VaspBaseWorkChain.__name__} in the called workchain list.')
             return self.exit_codes.ERROR_NO_CALLED_WORKCHAIN  # pylint: disable=no-member
 
         if not workchain.is_finished_ok:
             self.report('Workchain failed with unrecoverable failure!')
             return self.exit_codes.ERROR_UNRECOVERABLE_FAILURE  # pylint: disable=no-member
 
+        misc = workchain.outputs.misc.get_dict()
+        calc_type = self.ctx.stage_calc_types[self.ctx.stage_tag]
+        label = f'{self.ctx.stage_tag}_{calc_type}'
+
         # We need to know if it is a production relax stage.
         self.ctx.prod_static = False
         self.ctx.prod_relax = False
-        nsw = self.ctx.vasp_base.vasp.parameters.get_dict().get('NSW')
+        nsw = self.ctx.vasp_base.vasp.parameters.get('NSW')
         # Here we check of the run is production or burn! In case of production we need to check for convergence!
-        if self.ctx.stage_calc_types[self.ctx.stage_tag] == 'relaxation':
+        if calc_type == 'relaxation':
             if self.ctx.stage_tag != 'stage_0':
                 self.ctx.prod_relax = True
                 self.ctx.current_structure = workchain.outputs.structure
@@ -623,20 +601,20 @@ class VaspMultiStageWorkChain(WorkChain):
                 self.ctx.prod_relax = False
                 self.ctx.current_structure = workchain.outputs.structure
 
-        if self.ctx.stage_calc_types[self.ctx.stage_tag] == 'static':
+        if calc_type == 'static':
             if self.ctx.stage_tag != 'stage_0':
                 self.ctx.prod_static = True
             # In case someone just wants to run a single stage static calculations.
-            elif (self.ctx.stage_tag == 'stage_0' and len(list(self.ctx.protocol.get_dict().keys())) == 1):
+            elif (self.ctx.stage_tag == 'stage_0' and len(self.ctx.protocol) == 1):
                 self.ctx.prod_static = True
 
         # If it is an inital stage, we do not look for convergence.
         if (not self.ctx.prod_static) and (not self.ctx.prod_relax):
             converged = True
         elif self.ctx.prod_static:
-            converged = workchain.outputs.misc['converged_electronically']
+            converged = misc['converged_electronically']
         elif self.ctx.prod_relax:
-            converged = workchain.outputs.misc['converged']
+            converged = misc['converged']
 
         # Assigning restart folder and INCAR from previous run
         self.ctx.restart_folder = workchain.outputs.remote_folder
@@ -644,15 +622,23 @@ class VaspMultiStageWorkChain(WorkChain):
 
         # Handling convergence issues for static and relax run.
         if (not converged) and self.ctx.prod_static:
-            self.ctx.modifications = {}
             self.ctx.stage_iteration += 1
-            nelm = self.ctx.prev_incar.get_dict().get('NELM', 200) * 2
-            if self.ctx.vasp_base.vasp.parameters['ALGO'] in ['Fast', 'VeryFast']:
-                self.ctx.modifications.update({'ALGO': 'Normal', 'NELM': nelm, 'ISTART': 0, 'ICHARG': 2})
-            elif self.ctx.vasp_base.vasp.parameters['ALGO'] in ['Normal']:
-                self.ctx.modifications.update({'ALGO': 'All', 'NELM': nelm, 'ISTART': 0, 'ICHARG': 2})
-            algo = self.ctx.modifications['ALGO']
-            self.report(f'Electronic Convergence has not been reached: ALGO is set to {algo} and NELM is set to {nelm}')
+            prev_incar = self.ctx.prev_incar.get_dict()
+            nelm = prev_incar.get('NELM', 200) * 2
+            self.ctx.modifications = {'NELM': nelm, 'ISTART': 0, 'ICHARG': 2}
+            # Decide on the fallback from what the last calculation actually ran with.
+            algo = prev_incar.get('ALGO')
+            if algo in ['Fast', 'VeryFast']:
+                self.ctx.modifications['ALGO'] = 'Normal'
+            elif algo in ['Normal']:
+                self.ctx.modifications['ALGO'] = 'All'
+            if 'ALGO' in self.ctx.modifications:
+                self.report(
+                    f'Electronic Convergence has not been reached: ALGO is set to {self.ctx.modifications["ALGO"]} '
+                    f'and NELM is set to {nelm}'
+                )
+            else:
+                self.report(f'Electronic Convergence has not been reached: ALGO {algo} is kept and NELM is set to {nelm}')
         elif (not converged) and self.ctx.prod_relax:
             self.ctx.modifications = {}
             self.ctx.stage_iteration += 1
@@ -662,23 +648,20 @@ class VaspMultiStageWorkChain(WorkChain):
         # If it is converged, we move on to next stage.
         elif converged:
             self.ctx.stage_idx += 1
-            bg_down = workchain.outputs.misc['band_gap_spin_down']
-            bg_up = workchain.outputs.misc['band_gap_spin_up']
+            bg_down = misc['band_gap_spin_down']
+            bg_up = misc['band_gap_spin_up']
             self.report(f'Band Gaps are {bg_down} and {bg_up}')
-            self.out(
-                f'final_incar.{self.ctx.stage_tag}_{self.ctx.stage_calc_types[self.ctx.stage_tag]}', self.ctx.prev_incar
-            )
-            self.ctx.all_outputs[f'{self.ctx.stage_tag}_{self.ctx.stage_calc_types[self.ctx.stage_tag]}'
-                                 ] = workchain.outputs.misc
+            self.out(f'final_incar.{label}', self.ctx.prev_incar)
+            self.ctx.all_outputs[label] = workchain.outputs.misc
             self.ctx.stage_iteration = 0
             self.ctx.modifications = None
 
-        if self.ctx.stage_iteration > self.inputs.max_stage_iteration:
+        if self.ctx.stage_iteration > self.ctx.max_stage_iteration:
             self.report(f'Could not reach the convergence in stage_{self.ctx.stage_idx}! Better check them manually!')
             self.ctx.should_run_next_stage = False
             return self.exit_codes.ERROR_NON_CONVERGED_GEOMETRY  # pylint: disable=no-member
 
-        if not f'stage_{self.ctx.stage_idx}' in self.ctx.protocol.get_dict():
+        if not f'stage_{self.ctx.stage_idx}' in self.ctx.protocol:
             self.report('All stages are computed!')
             self.ctx.should_run_next_stage = False
 